@@ -1,71 +1,77 @@
 """
 ReAct Agent - 多轮思考行动
 """
+import io
+
 from app.ollama import ollama
 from app.models.tools import TOOLS
 
 
+# 静态提示词模板，占位符在初始化/调用时替换
+PROMPT_TEMPLATE = """你是一个助手，使用 ReAct 模式解决问题。
+
+可用工具：
+{tool_descriptions}
+
+请按以下格式回复：
+Thought: 思考当前需要做什么
+Action: 工具名("参数") 或者 无
+Observation: （等待工具结果）
+
+如果已经有足够信息回答问题，回复：
+Thought: 我已经有足够信息了
+Final Answer: 最终答案
+
+用户问题：{question}
+"""
+
+
 class ReActAgent:
     """ReAct 模式 Agent"""
 
     def __init__(self, max_iterations: int = 5):
         self.tools = TOOLS
         self.max_iterations = max_iterations  # 最多循环几次
+        # 工具列表和提示词前缀只在启动时渲染一次
+        self._tools_desc = self._get_tool_descriptions()
+        self._prompt_prefix = PROMPT_TEMPLATE.replace(
+            "{tool_descriptions}", self._tools_desc
+        )
 
     def _get_tool_descriptions(self) -> str:
-        descriptions = []
-        for name, tool in self.tools.items():
-            descriptions.append(f"- {name}: {tool['description']}")
-        return "\n".join(descriptions)
+        return "\n".join(
+            f"- {name}: {tool['description']}"
+            for name, tool in self.tools.items()
+        )
 
     def _execute_tool(self, tool_name: str, tool_args: str) -> str:
-        if tool_name not in self.tools:
+        spec = self.tools.get(tool_name)
+        if spec is None:
             return f"未知工具: {tool_name}"
 
-        tool_func = self.tools[tool_name]["function"]
-
-        if tool_name == "get_current_time":
-            return tool_func()
-        elif tool_name == "calculate":
-            return tool_func(tool_args)
-        elif tool_name == "get_weather":
-            return tool_func(tool_args)
-        elif tool_name == "web_search":
-            return tool_func(tool_args)
-
-        return "工具执行失败"
+        # arity 由注册表声明：0 = 无参数（如 get_current_time），1 = 单字符串参数
+        # 未声明 arity 且模型没给参数时也走无参调用，避免 TypeError
+        if spec.get("arity", 1) == 0 or not tool_args:
+            return spec["function"]()
+        return spec["function"](tool_args)
 
     def run(self, question: str) -> str:
         """运行 ReAct Agent"""
 
-        tool_desc = self._get_tool_descriptions()
+        # 前缀每次 run 只渲染一次，循环内只追加历史
+        base_prompt = self._prompt_prefix.replace("{question}", question)
 
-        # 记录整个思考过程
-        thought_history = []
+        # 记录整个思考过程（增量写入缓冲区，避免每轮重新 join 全部历史）
+        history_buf = io.StringIO()
 
         for i in range(self.max_iterations):
             print(f"\n{'=' * 50}")
             print(f"🔄 第 {i + 1} 轮思考")
 
             # 构建 prompt，包含历史记录
-            history_text = "\n".join(thought_history)
-
-            prompt = f"""你是一个助手，使用 ReAct 模式解决问题。
-
-可用工具：
-{tool_desc}
-
-请按以下格式回复：
-Thought: 思考当前需要做什么
-Action: 工具名("参数") 或者 无
-Observation: （等待工具结果）
-
-如果已经有足够信息回答问题，回复：
-Thought: 我已经有足够信息了
-Final Answer: 最终答案
-
-用户问题：{question}
+            history_text = history_buf.getvalue()
 
+            prompt = f"""{base_prompt}
 {history_text}
 
 继续："""
@@ -73,28 +79,25 @@ Final Answer: 最终答案
             response = ollama.chat(prompt)
             print(f"🤖 AI 回复:\n{response}")
 
-            # 检查是否有最终答案
-            if "Final Answer:" in response:
-                # 提取最终答案
-                answer_start = response.index("Final Answer:") + 13
-                final_answer = response[answer_start:].strip()
+            # 检查是否有最终答案（partition 单次扫描，不会抛异常）
+            _, sep, answer_tail = response.partition("Final Answer:")
+            if sep:
+                final_answer = answer_tail.strip()
                 print(f"\n✅ 最终答案: {final_answer}")
                 return final_answer
 
             # 解析 Action
-            if "Action:" in response:
-                action_start = response.index("Action:") + 7
-                action_end = response.find("\n", action_start)
-                if action_end == -1:
-                    action_end = len(response)
-                action = response[action_start:action_end].strip()
+            _, sep, action_tail = response.partition("Action:")
+            if sep:
+                action_line, _, _ = action_tail.partition("\n")
+                action = action_line.strip()
 
                 if action != "无" and "(" in action:
                     # 解析工具名和参数
-                    tool_name = action[:action.index("(")].strip()
-                    args_start = action.index("(") + 1
-                    args_end = action.rindex(")")
-                    tool_args = action[args_start:args_end].strip().strip('"\'')
+                    tool_name, _, args_part = action.partition("(")
+                    tool_name = tool_name.strip()
+                    tool_args, _, _ = args_part.rpartition(")")
+                    tool_args = tool_args.strip().strip('"\'')
 
                     # 执行工具
                     print(f"🔧 执行工具: {tool_name}({tool_args})")
@@ -102,12 +105,11 @@ Final Answer: 最终答案
                     print(f"📋 观察结果: {observation}")
 
                     # 记录这一轮
-                    thought_history.append(response)
-                    thought_history.append(f"Observation: {observation}")
+                    history_buf.write(f"{response}\nObservation: {observation}\n")
                 else:
-                    thought_history.append(response)
+                    history_buf.write(f"{response}\n")
             else:
-                thought_history.append(response)
+                history_buf.write(f"{response}\n")
 
         return "达到最大迭代次数，无法完成任务"
 
@@ -1,118 +1,114 @@
 """
 ReAct Agent
+使用 Ollama 原生 function-calling，一次调用同时拿到思考和工具调用
 """
-import re
-from typing import List, Tuple, Optional
+import asyncio
+from collections import deque
 
+from app.config import settings
 from app.llm.ollama_client import llm_client
 from app.tools.registry import tool_registry
-from app.agent.prompts import REACT_SYSTEM_PROMPT, REACT_CONTINUE_PROMPT
+from app.agent.prompts import AGENT_SYSTEM_PROMPT
 
 
 class ReActAgent:
     def __init__(self, max_iterations: int = 5):
         self.max_iterations = max_iterations
         self.tools = tool_registry
+        # 工具 Schema 启动时构建一次，避免每轮重复生成
+        self._tool_schemas = tool_registry.get_tool_schemas()
+        # 名字 -> 工具对象的直接映射，热路径上免去注册表方法调用
+        self._dispatch = {tool.name: tool for tool in tool_registry.iter_tools()}
+        # 限制同一轮工具调用的并发数
+        self._tool_semaphore = asyncio.Semaphore(settings.TOOL_CONCURRENCY_LIMIT)
+        # 历史滑动窗口大小（轮数）
+        self._history_window = settings.MAX_HISTORY_TURNS
+
+    @staticmethod
+    def _parse_calls(tool_calls: list) -> list:
+        """把原生 tool_calls 解析成 (工具名, 参数) 列表"""
+        calls = []
+        for call in tool_calls:
+            function = call.get("function", {})
+            action = function.get("name", "")
+            arguments = function.get("arguments") or {}
+            # 工具都是单参数（或无参数），取第一个参数值
+            action_input = str(next(iter(arguments.values()), ""))
+            calls.append((action, action_input))
+        return calls
+
+    async def _execute_tool(self, action: str, action_input: str) -> str:
+        """执行单个工具，返回观察结果字符串"""
+        tool = self._dispatch.get(action)
+
+        if not tool:
+            return f"未知工具: {action}，可用: {', '.join(self.tools.list_tools())}"
+
+        async with self._tool_semaphore:
+            try:
+                # 工具内部是同步 I/O，放到线程池避免阻塞事件循环
+                if action_input:
+                    result = await asyncio.to_thread(tool, action_input)
+                else:
+                    result = await asyncio.to_thread(tool)
+                return result.data if result.success else f"错误: {result.error}"
+            except Exception as e:
+                return f"工具执行异常: {e}"
 
-    def _parse_response(self, response: str) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
-        thought = ""
-        action = None
-        action_input = None
-        final_answer = None
-
-        # 提取 Thought
-        thought_match = re.search(r'Thought:\s*(.+?)(?=Action:|Final Answer:|$)', response, re.DOTALL)
-        if thought_match:
-            thought = thought_match.group(1).strip()
-
-        # 提取 Final Answer
-        final_match = re.search(r'Final Answer:\s*(.+?)$', response, re.DOTALL)
-        if final_match:
-            final_answer = final_match.group(1).strip()
-            return thought, None, None, final_answer
-
-        # 提取 Action
-        action_patterns = [
-            r'Action:\s*(\w+)\s*\(\s*["\']?([^"\']*)["\']?\s*\)',
-            r'Action:\s*(\w+)\s*\(([^)]*)\)',
-            r'Action:\s*(\w+)',
-        ]
-
-        for pattern in action_patterns:
-            action_match = re.search(pattern, response)
-            if action_match:
-                action = action_match.group(1).strip()
-                action_input = action_match.group(2).strip() if action_match.lastindex >= 2 else ""
-                action_input = action_input.strip('"\'')
-                break
-
-        return thought, action, action_input, final_answer
-
-    def run(self, question: str) -> dict:
+    async def run(self, question: str) -> dict:
         """运行 Agent，返回字典格式结果"""
         steps = []  # 使用字典列表，而不是 dataclass
-        history_lines = []
-
-        initial_prompt = REACT_SYSTEM_PROMPT.format(
-            tool_descriptions=self.tools.get_tools_description(),
-            question=question
-        )
+        preamble = [
+            {"role": "system", "content": AGENT_SYSTEM_PROMPT},
+            {"role": "user", "content": question}
+        ]
+        # 滑动窗口：只保留最近若干条工具往来消息，限制每轮的上下文 token 数
+        history = deque(maxlen=self._history_window * 3)
 
         for i in range(self.max_iterations):
             print(f"\n{'='*50}")
             print(f"🔄 第 {i+1} 轮思考")
 
-            if i == 0:
-                current_prompt = initial_prompt
-            else:
-                history_text = "\n".join(history_lines)
-                current_prompt = initial_prompt + REACT_CONTINUE_PROMPT.format(history=history_text)
-
-            response = llm_client.chat(current_prompt)
-            print(f"🤖 AI: {response[:300]}...")
-
-            thought, action, action_input, final_answer = self._parse_response(response)
+            messages = [*preamble, *history]
+            message = await llm_client.achat_messages(messages, tools=self._tool_schemas)
+            content = message.get("content", "")
+            tool_calls = message.get("tool_calls") or []
+            print(f"🤖 AI: {content[:300]}...")
 
-            # 使用字典而不是 dataclass
-            step = {
-                "thought": thought,
-                "action": action,
-                "action_input": action_input,
-                "observation": None
-            }
-
-            if final_answer:
-                print(f"\n✅ 最终答案: {final_answer}")
+            # 没有工具调用 = 最终答案
+            if not tool_calls:
+                print(f"\n✅ 最终答案: {content}")
                 return {
-                    "answer": final_answer,
+                    "answer": content,
                     "steps": steps,
                     "iterations": i + 1
                 }
 
-            if action:
+            history.append(message)
+
+            calls = self._parse_calls(tool_calls)
+            for action, action_input in calls:
                 print(f"🔧 执行: {action}({action_input})")
-                tool = self.tools.get(action)
-
-                if tool:
-                    try:
-                        result = tool(action_input) if action_input else tool()
-                        observation = result.data if result.success else f"错误: {result.error}"
-                    except Exception as e:
-                        observation = f"工具执行异常: {e}"
-                else:
-                    observation = f"未知工具: {action}，可用: {', '.join(self.tools.list_tools())}"
 
-                print(f"📋 结果: {observation}")
-                step["observation"] = observation
+            # 多个独立工具调用并发执行，耗时取最大值而不是总和
+            observations = await asyncio.gather(
+                *(self._execute_tool(a, arg) for a, arg in calls),
+                return_exceptions=True
+            )
 
-                history_lines.append(f"Thought: {thought}")
-                history_lines.append(f"Action: {action}(\"{action_input}\")")
-                history_lines.append(f"Observation: {observation}")
-            else:
-                history_lines.append(f"Thought: {thought}")
-                history_lines.append("Observation: 请给出 Action 或 Final Answer")
+            # 按原始顺序回填观察结果
+            for (action, action_input), observation in zip(calls, observations):
+                if isinstance(observation, BaseException):
+                    observation = f"工具执行异常: {observation}"
+                print(f"📋 结果: {observation}")
 
-            steps.append(step)
+                steps.append({
+                    "thought": content,
+                    "action": action,
+                    "action_input": action_input,
+                    "observation": observation
+                })
+                history.append({"role": "tool", "content": str(observation)})
 
         return {
             "answer": "达到最大思考轮数，无法完成任务。",
@@ -120,5 +116,63 @@ class ReActAgent:
             "iterations": self.max_iterations
         }
 
+    async def run_stream(self, question: str):
+        """流式运行 Agent，逐事件产出
+
+        事件类型：thought_chunk（思考增量）、tool_call（工具调用）、
+        observation（工具结果）、final（结束标记；text 仅在答案
+        未经流式发出时才有内容，如超出轮数的兜底提示）
+        """
+        preamble = [
+            {"role": "system", "content": AGENT_SYSTEM_PROMPT},
+            {"role": "user", "content": question}
+        ]
+        history = deque(maxlen=self._history_window * 3)
 
-react_agent = ReActAgent()
\ No newline at end of file
+        for i in range(self.max_iterations):
+            messages = [*preamble, *history]
+
+            # 逐 token 转发 LLM 输出，首字节延迟 = 首个 token 延迟
+            content = ""
+            tool_calls = []
+            async for chunk in llm_client.achat_messages_stream(
+                messages, tools=self._tool_schemas
+            ):
+                piece = chunk.get("content", "")
+                if piece:
+                    content += piece
+                    yield {"type": "thought_chunk", "text": piece}
+                if chunk.get("tool_calls"):
+                    tool_calls.extend(chunk["tool_calls"])
+
+            # 没有工具调用 = 最终答案。正文已随 thought_chunk 流式发出，
+            # final 只作结束标记（text 留空，避免客户端把答案渲染两遍）
+            if not tool_calls:
+                yield {"type": "final", "text": ""}
+                return
+
+            history.append({
+                "role": "assistant",
+                "content": content,
+                "tool_calls": tool_calls
+            })
+
+            calls = self._parse_calls(tool_calls)
+            for action, action_input in calls:
+                yield {"type": "tool_call", "action": action, "action_input": action_input}
+
+            observations = await asyncio.gather(
+                *(self._execute_tool(a, arg) for a, arg in calls),
+                return_exceptions=True
+            )
+
+            for (action, action_input), observation in zip(calls, observations):
+                if isinstance(observation, BaseException):
+                    observation = f"工具执行异常: {observation}"
+                yield {"type": "observation", "action": action, "text": str(observation)}
+                history.append({"role": "tool", "content": str(observation)})
+
+        yield {"type": "final", "text": "达到最大思考轮数，无法完成任务。"}
+
+
+react_agent = ReActAgent()
@@ -1,8 +1,7 @@
 """
 Agent API 路由
 """
-import json
-import asyncio
+import orjson
 import traceback
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
@@ -15,6 +14,11 @@ from app.tools.registry import tool_registry
 router = APIRouter(prefix="/agent", tags=["Agent"])
 
 
+def _dumps(obj: dict) -> str:
+    """SSE 载荷序列化（orjson 对中文/嵌套字典比 stdlib json 快数倍）"""
+    return orjson.dumps(obj).decode()
+
+
 # ========== 数据模型 ==========
 
 class AgentQuery(BaseModel):
@@ -34,48 +38,46 @@ async def agent_chat_stream(query: AgentQuery):
     """Agent 流式对话接口"""
 
     async def generate():
-        yield f"data: {json.dumps({'type': 'session', 'session_id': query.session_id or 'default'})}\n\n"
+        yield f"data: {_dumps({'type': 'session', 'session_id': query.session_id or 'default'})}\n\n"
 
         try:
             print(f"📝 收到问题: {query.question}")
-            result = await asyncio.to_thread(react_agent.run, query.question)
-            print(f"📦 Agent 返回: {result}")
-
-            if not isinstance(result, dict):
-                raise ValueError(f"Agent 返回类型错误: {type(result)}")
-
-            steps = result.get("steps", [])
-
-            for step in steps:
-                thought = step.get('thought', '')
-                action = step.get('action')
-                action_input = step.get('action_input', '')
-                observation = step.get('observation')
 
-                if thought:
-                    text = f"🤔 思考: {thought}\n"
-                    yield f"data: {json.dumps({'type': 'content', 'text': text})}\n\n"
-                    await asyncio.sleep(0.05)
-
-                if action:
-                    text = f"🔧 执行: {action}({action_input})\n"
-                    yield f"data: {json.dumps({'type': 'content', 'text': text})}\n\n"
-                    await asyncio.sleep(0.05)
-
-                if observation:
-                    text = f"📋 结果: {observation}\n\n"
-                    yield f"data: {json.dumps({'type': 'content', 'text': text})}\n\n"
-                    await asyncio.sleep(0.05)
-
-            answer = result.get("answer", "抱歉，无法回答")
-            text = f"\n✅ {answer}"
-            yield f"data: {json.dumps({'type': 'content', 'text': text})}\n\n"
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            # LLM token 一产出就转发，首字节延迟 = 首个 token 延迟
+            # 工具调用和结果合并为一个结构化 step 帧，减少 SSE 帧数
+            pending_calls = []
+            async for event in react_agent.run_stream(query.question):
+                event_type = event["type"]
+
+                if event_type == "thought_chunk":
+                    yield f"data: {_dumps({'type': 'content', 'text': event['text']})}\n\n"
+
+                elif event_type == "tool_call":
+                    pending_calls.append(event)
+
+                elif event_type == "observation":
+                    call = pending_calls.pop(0) if pending_calls else {}
+                    step = {
+                        "type": "step",
+                        "action": event.get("action", ""),
+                        "action_input": call.get("action_input", ""),
+                        "observation": event["text"]
+                    }
+                    yield f"data: {_dumps(step)}\n\n"
+
+                elif event_type == "final":
+                    # text 非空说明答案没走流式（如超轮数兜底），才需要补发；
+                    # 正常结束时正文已按 content 帧发完，避免重复渲染
+                    if event["text"]:
+                        text = f"\n✅ {event['text']}"
+                        yield f"data: {_dumps({'type': 'content', 'text': text})}\n\n"
+
+            yield f"data: {_dumps({'type': 'done'})}\n\n"
 
         except Exception as e:
             error_detail = traceback.format_exc()
             print(f"❌ Agent 错误:\n{error_detail}")
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield f"data: {_dumps({'type': 'error', 'message': str(e)})}\n\n"
 
     return StreamingResponse(
         generate(),
@@ -84,11 +86,17 @@ async def agent_chat_stream(query: AgentQuery):
     )
 
 
+# 工具集在启动后不变，列表只构建一次
+_tool_info_cache: Optional[List[ToolInfo]] = None
+
+
 @router.get("/tools", response_model=List[ToolInfo])
 async def list_tools():
     """列出所有可用工具"""
-    tools = []
-    for name in tool_registry.list_tools():
-        tool = tool_registry.get(name)
-        tools.append(ToolInfo(name=tool.name, description=tool.description))
-    return tools
\ No newline at end of file
+    global _tool_info_cache
+    if _tool_info_cache is None:
+        _tool_info_cache = [
+            ToolInfo(name=tool.name, description=tool.description)
+            for tool in tool_registry.iter_tools()
+        ]
+    return _tool_info_cache
\ No newline at end of file
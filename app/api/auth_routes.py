@@ -5,6 +5,8 @@ app/api/auth_routes.py
 from fastapi import APIRouter, HTTPException, Depends, Header
 from typing import Optional
 
+from cachetools import TTLCache
+
 from app.core.auth import (
     UserCreate, UserLogin, UserResponse, TokenResponse,
     UserManager, create_access_token, decode_token
@@ -15,6 +17,9 @@ router = APIRouter(prefix="/auth", tags=["认证"])
 # 用户管理器（在 main.py 中初始化后设置）
 user_manager: UserManager = None
 
+# 用户信息短 TTL 缓存：token 已验签，无需每个请求都查一次 SQLite
+_user_cache: TTLCache = TTLCache(maxsize=10000, ttl=60)
+
 
 async def init_auth(db_path: str):
     """初始化认证模块"""
@@ -24,6 +29,12 @@ async def init_auth(db_path: str):
     print("✅ 用户认证模块初始化完成")
 
 
+async def close_auth():
+    """关闭认证模块（应用关闭时调用）"""
+    if user_manager is not None:
+        await user_manager.close()
+
+
 # ========== 获取当前用户（依赖注入）==========
 async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     """
@@ -47,7 +58,12 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     if not user_id:
         raise HTTPException(status_code=401, detail="Token无效")
 
-    user = await user_manager.get_user_by_id(int(user_id))
+    user = _user_cache.get(user_id)
+    if user is None:
+        user = await user_manager.get_user_by_id(int(user_id))
+        if user:
+            _user_cache[user_id] = user
+
     if not user:
         raise HTTPException(status_code=401, detail="用户不存在")
 
@@ -29,6 +29,11 @@ class Settings(BaseSettings):
 
     # 对话配置
     MAX_HISTORY_TURNS: int = 10  # 保留最近10轮对话
+    CONTEXT_WINDOW: int = 8192  # 模型上下文窗口（token）
+    RESERVED_OUTPUT_TOKENS: int = 1024  # 为生成预留的 token（与 num_predict 对应）
+
+    # Agent配置
+    TOOL_CONCURRENCY_LIMIT: int = 4  # 同一轮工具调用的最大并发数
 
     # ========== JWT 认证配置 ==========
     SECRET_KEY: str = "your-super-secret-key-change-this-in-production-123456"
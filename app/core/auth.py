@@ -2,11 +2,16 @@
 app/core/auth.py
 用户认证核心模块
 """
+import asyncio
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 import aiosqlite
 from pathlib import Path
 
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
@@ -14,17 +19,34 @@ from pydantic import BaseModel
 from app.config import settings
 
 # ========== 密码加密 ==========
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 直接调用 argon2-cffi，绕过 passlib 每次调用的 scheme 探测开销
+_ph = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+# passlib 仅保留用于校验遗留 bcrypt 哈希（登录成功后迁移为 argon2）
+_legacy_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def hash_password(password: str) -> str:
     """加密密码"""
-    return pwd_context.hash(password)
+    return _ph.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith("$argon2"):
+        try:
+            return _ph.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+    # 遗留 bcrypt 哈希
+    return _legacy_context.verify(plain_password, hashed_password)
+
+
+def password_needs_update(hashed_password: str) -> bool:
+    """哈希是否需要迁移（遗留 bcrypt 或 argon2 参数过旧）"""
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return _ph.check_needs_rehash(hashed_password)
 
 
 # ========== JWT Token ==========
@@ -42,14 +64,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+@lru_cache(maxsize=10000)
+def _decode_cached(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
 def decode_token(token: str) -> Optional[dict]:
-    """解析 JWT Token"""
+    """解析 JWT Token（LRU 缓存，同一 token 重复请求免去重复验签）"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        payload = _decode_cached(token)
     except JWTError:
         return None
 
+    # 缓存命中的条目也要检查过期时间
+    if payload.get("exp", 0) < time.time():
+        return None
+    return payload
+
 
 # ========== 用户数据模型 ==========
 class UserCreate(BaseModel):
@@ -86,41 +117,51 @@ class UserManager:
 
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # 长连接：认证是每个请求都走的热路径，避免每次 connect 的开销
+        self._conn: Optional[aiosqlite.Connection] = None
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
     async def init_db(self):
-        """初始化用户表"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                             CREATE TABLE IF NOT EXISTS users
-                             (
-                                 id
-                                 INTEGER
-                                 PRIMARY
-                                 KEY
-                                 AUTOINCREMENT,
-                                 username
-                                 TEXT
-                                 UNIQUE
-                                 NOT
-                                 NULL,
-                                 password_hash
-                                 TEXT
-                                 NOT
-                                 NULL,
-                                 email
-                                 TEXT,
-                                 created_at
-                                 TEXT,
-                                 updated_at
-                                 TEXT
-                             )
-                             """)
-            await db.execute("""
-                             CREATE INDEX IF NOT EXISTS idx_users_username
-                                 ON users(username)
-                             """)
-            await db.commit()
+        """初始化用户表并建立长连接"""
+        self._conn = await aiosqlite.connect(self.db_path)
+        self._conn.row_factory = aiosqlite.Row
+        # WAL + NORMAL：提升写入吞吐，安全性足够
+        await self._conn.execute("PRAGMA journal_mode=WAL")
+        await self._conn.execute("PRAGMA synchronous=NORMAL")
+        await self._conn.execute("""
+                         CREATE TABLE IF NOT EXISTS users
+                         (
+                             id
+                             INTEGER
+                             PRIMARY
+                             KEY
+                             AUTOINCREMENT,
+                             username
+                             TEXT
+                             UNIQUE
+                             NOT
+                             NULL,
+                             password_hash
+                             TEXT
+                             NOT
+                             NULL,
+                             email
+                             TEXT,
+                             created_at
+                             TEXT,
+                             updated_at
+                             TEXT
+                         )
+                         """)
+        # username 的 UNIQUE 约束已自带索引，显式索引是冗余的（拖慢插入）
+        await self._conn.execute("DROP INDEX IF EXISTS idx_users_username")
+        await self._conn.commit()
+
+    async def close(self):
+        """关闭数据库连接（应用关闭时调用）"""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
 
     async def create_user(self, user: UserCreate) -> Optional[UserResponse]:
         """创建用户"""
@@ -128,51 +169,69 @@ class UserManager:
         password_hash = hash_password(user.password)
 
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute(
-                    """INSERT INTO users (username, password_hash, email, created_at, updated_at)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (user.username, password_hash, user.email, now, now)
-                )
-                await db.commit()
-                user_id = cursor.lastrowid
-
-                return UserResponse(
-                    id=user_id,
-                    username=user.username,
-                    email=user.email,
-                    created_at=now
-                )
+            cursor = await self._conn.execute(
+                """INSERT INTO users (username, password_hash, email, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (user.username, password_hash, user.email, now, now)
+            )
+            await self._conn.commit()
+            user_id = cursor.lastrowid
+
+            return UserResponse(
+                id=user_id,
+                username=user.username,
+                email=user.email,
+                created_at=now
+            )
         except aiosqlite.IntegrityError:
             return None
 
     async def get_user_by_username(self, username: str) -> Optional[dict]:
         """根据用户名获取用户"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(
-                "SELECT * FROM users WHERE username = ?",
-                (username,)
-            )
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        cursor = await self._conn.execute(
+            "SELECT * FROM users WHERE username = ?",
+            (username,)
+        )
+        row = await cursor.fetchone()
+        return dict(row) if row else None
 
     async def get_user_by_id(self, user_id: int) -> Optional[dict]:
         """根据ID获取用户"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(
-                "SELECT * FROM users WHERE id = ?",
-                (user_id,)
-            )
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+        cursor = await self._conn.execute(
+            "SELECT * FROM users WHERE id = ?",
+            (user_id,)
+        )
+        row = await cursor.fetchone()
+        return dict(row) if row else None
 
     async def authenticate(self, username: str, password: str) -> Optional[dict]:
         """验证用户登录"""
-        user = await self.get_user_by_username(username)
-        if not user:
+        # 只取需要的列，避免 SELECT * 的整行物化
+        cursor = await self._conn.execute(
+            """SELECT id, username, password_hash, email, created_at
+               FROM users WHERE username = ?""",
+            (username,)
+        )
+        row = await cursor.fetchone()
+        if row is None:
             return None
-        if not verify_password(password, user["password_hash"]):
+        user = dict(row)
+
+        # 密码验证是纯 CPU 操作，放线程池避免阻塞事件循环
+        valid = await asyncio.to_thread(
+            verify_password, password, user["password_hash"]
+        )
+        if not valid:
             return None
+
+        # 旧的 bcrypt 哈希在登录成功后迁移为 argon2
+        if password_needs_update(user["password_hash"]):
+            new_hash = await asyncio.to_thread(hash_password, password)
+            await self._conn.execute(
+                "UPDATE users SET password_hash = ?, updated_at = ? WHERE id = ?",
+                (new_hash, datetime.now().isoformat(), user["id"])
+            )
+            await self._conn.commit()
+            user["password_hash"] = new_hash
+
         return user
\ No newline at end of file
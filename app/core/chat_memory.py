@@ -5,6 +5,7 @@
 import json
 import uuid
 import aiosqlite
+from aiosqlitepool import SQLiteConnectionPool
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -32,15 +33,34 @@ class ChatMemoryManager:
     def __init__(self, db_path: str, max_history: int = 10):
         self.db_path = db_path
         self.max_history = max_history
+        # 连接池：复用连接避免每次查询的 open/close，并保住 SQLite 页缓存
+        self._pool: Optional[SQLiteConnectionPool] = None
         self._ensure_dir()
 
     def _ensure_dir(self):
         """确保目录存在"""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
 
+    async def _connection_factory(self) -> aiosqlite.Connection:
+        """创建池内连接并设置热路径 PRAGMA"""
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        await conn.execute("PRAGMA cache_size=-20000")  # 20MB 页缓存
+        return conn
+
+    async def close(self):
+        """关闭连接池（应用关闭时调用）"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
     async def init_db(self):
         """初始化数据库表"""
-        async with aiosqlite.connect(self.db_path) as db:
+        self._pool = SQLiteConnectionPool(self._connection_factory, pool_size=8)
+        async with self._pool.connection() as db:
             # 会话表
             await db.execute("""
                              CREATE TABLE IF NOT EXISTS sessions
@@ -56,8 +76,12 @@ class ChatMemoryManager:
                                  updated_at
                                  TEXT,
                                  metadata
-                                 TEXT
-                             )
+                                 TEXT,
+                                 message_count
+                                 INTEGER
+                                 DEFAULT
+                                 0
+                             ) WITHOUT ROWID
                              """)
             # 消息表
             await db.execute("""
@@ -86,11 +110,55 @@ class ChatMemoryManager:
                              )
                                  )
                              """)
-            # 索引
+            # 复合索引：get_history 的 ORDER BY id DESC LIMIT 直接按索引顺序流出，
+            # 无需临时 B-tree 排序
+            await db.execute("DROP INDEX IF EXISTS idx_messages_session")
             await db.execute("""
-                             CREATE INDEX IF NOT EXISTS idx_messages_session
-                                 ON messages(session_id)
+                             CREATE INDEX IF NOT EXISTS idx_messages_session_id
+                                 ON messages(session_id, id DESC)
                              """)
+
+            # 迁移：为旧库补上 message_count 列并回填计数
+            cursor = await db.execute("PRAGMA table_info(sessions)")
+            columns = [row["name"] for row in await cursor.fetchall()]
+            if "message_count" not in columns:
+                await db.execute(
+                    "ALTER TABLE sessions ADD COLUMN message_count INTEGER DEFAULT 0"
+                )
+                await db.execute(
+                    """UPDATE sessions
+                       SET message_count = (SELECT COUNT(*)
+                                            FROM messages
+                                            WHERE messages.session_id = sessions.session_id)"""
+                )
+
+            # 迁移：旧库的 sessions 若还是 rowid 表，重建为 WITHOUT ROWID
+            # （TEXT 主键 + rowid 表要维护两棵 B-tree，点查/写入都多一倍）
+            cursor = await db.execute(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name='sessions'"
+            )
+            row = await cursor.fetchone()
+            if row and "WITHOUT ROWID" not in row["sql"]:
+                await db.execute("""
+                                 CREATE TABLE sessions_new
+                                 (
+                                     session_id TEXT PRIMARY KEY,
+                                     user_id TEXT,
+                                     created_at TEXT,
+                                     updated_at TEXT,
+                                     metadata TEXT,
+                                     message_count INTEGER DEFAULT 0
+                                 ) WITHOUT ROWID
+                                 """)
+                await db.execute(
+                    """INSERT INTO sessions_new
+                       SELECT session_id, user_id, created_at, updated_at,
+                              metadata, message_count
+                       FROM sessions"""
+                )
+                await db.execute("DROP TABLE sessions")
+                await db.execute("ALTER TABLE sessions_new RENAME TO sessions")
+
             await db.commit()
 
     async def create_session(
@@ -102,7 +170,7 @@ class ChatMemoryManager:
         session_id = str(uuid.uuid4())
         now = datetime.now().isoformat()
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.connection() as db:
             await db.execute(
                 """INSERT INTO sessions
                        (session_id, user_id, created_at, updated_at, metadata)
@@ -122,20 +190,52 @@ class ChatMemoryManager:
         """添加消息到会话"""
         now = datetime.now().isoformat()
 
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.connection() as db:
+            # 显式事务：INSERT + UPDATE 共享一次 fsync
+            await db.execute("BEGIN IMMEDIATE")
             # 添加消息
             await db.execute(
                 """INSERT INTO messages (session_id, role, content, timestamp)
                    VALUES (?, ?, ?, ?)""",
                 (session_id, role, content, now)
             )
-            # 更新会话时间
+            # 更新会话时间和消息计数
             await db.execute(
-                "UPDATE sessions SET updated_at = ? WHERE session_id = ?",
+                """UPDATE sessions
+                   SET updated_at = ?, message_count = message_count + 1
+                   WHERE session_id = ?""",
                 (now, session_id)
             )
             await db.commit()
 
+    async def add_messages(
+            self,
+            session_id: str,
+            items: list[tuple[str, str]]
+    ):
+        """批量添加消息（一问一答等成对消息共享一个事务、一次 fsync）
+
+        items: [(role, content), ...]
+        """
+        if not items:
+            return
+        now = datetime.now().isoformat()
+
+        async with self._pool.connection() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            await db.executemany(
+                """INSERT INTO messages (session_id, role, content, timestamp)
+                   VALUES (?, ?, ?, ?)""",
+                [(session_id, role, content, now) for role, content in items]
+            )
+            await db.execute(
+                """UPDATE sessions
+                   SET updated_at = ?, message_count = message_count + ?
+                   WHERE session_id = ?""",
+                (now, len(items), session_id)
+            )
+            await db.commit()
+
     async def get_history(
             self,
             session_id: str,
@@ -144,8 +244,7 @@ class ChatMemoryManager:
         """获取会话历史"""
         limit = limit or self.max_history
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._pool.connection() as db:
             cursor = await db.execute(
                 """SELECT role, content, timestamp
                    FROM messages
@@ -162,6 +261,59 @@ class ChatMemoryManager:
         ]
         return messages
 
+    async def iter_history_for_prompt(
+            self,
+            session_id: str,
+            max_tokens: int = 2000,
+            limit: Optional[int] = None
+    ) -> str:
+        """取最近消息并直接格式化为 prompt 历史段
+
+        单条 SQL 完成"最近 N 条 + 时间正序"：内层按 id 倒序取窗口，
+        外层再正序，省去 Python 侧构造 ChatMessage 列表和反转。
+        token 预算截断逻辑与 format_history_for_prompt 一致。
+        """
+        limit = limit or self.max_history
+
+        async with self._pool.connection() as db:
+            # 新会话的首轮必然没有历史：先查反范式化的计数（主键点查），
+            # 为 0 直接返回，跳过消息表扫描
+            cursor = await db.execute(
+                "SELECT message_count FROM sessions WHERE session_id = ? LIMIT 1",
+                (session_id,)
+            )
+            row = await cursor.fetchone()
+            if row is None or row["message_count"] == 0:
+                return ""
+
+            cursor = await db.execute(
+                """SELECT role, content
+                   FROM (SELECT id, role, content
+                         FROM messages
+                         WHERE session_id = ?
+                         ORDER BY id DESC LIMIT ?)
+                   ORDER BY id ASC""",
+                (session_id, limit * 2)  # 每轮2条消息
+            )
+            rows = await cursor.fetchall()
+
+        lines = []
+        total_tokens = 0
+
+        # 从最近的消息开始，倒序添加，超出预算即停
+        for row in reversed(rows):
+            role_name = "用户" if row["role"] == "human" else "助手"
+            line = f"{role_name}: {row['content']}"
+
+            line_tokens = count_tokens(line)
+            if total_tokens + line_tokens > max_tokens:
+                break
+
+            lines.insert(0, line)
+            total_tokens += line_tokens
+
+        return "\n".join(lines)
+
     async def get_langchain_history(self, session_id: str) -> list[BaseMessage]:
         """获取LangChain格式的历史消息（用于传给LLM）"""
         messages = await self.get_history(session_id)
@@ -177,33 +329,28 @@ class ChatMemoryManager:
 
     async def session_exists(self, session_id: str) -> bool:
         """检查会话是否存在"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.connection() as db:
             cursor = await db.execute(
-                "SELECT 1 FROM sessions WHERE session_id = ?",
+                "SELECT 1 FROM sessions WHERE session_id = ? LIMIT 1",
                 (session_id,)
             )
             return await cursor.fetchone() is not None
 
     async def get_session_count(self) -> int:
         """获取会话总数"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._pool.connection() as db:
             cursor = await db.execute("SELECT COUNT(*) FROM sessions")
             result = await cursor.fetchone()
             return result[0] if result else 0
 
     async def get_all_sessions(self) -> list[dict]:
         """获取所有会话列表"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._pool.connection() as db:
+            # message_count 已反范式化到 sessions，无需 JOIN 全部消息
             cursor = await db.execute(
-                """SELECT s.session_id,
-                          s.created_at,
-                          s.updated_at,
-                          COUNT(m.id) as message_count
-                   FROM sessions s
-                            LEFT JOIN messages m ON s.session_id = m.session_id
-                   GROUP BY s.session_id
-                   ORDER BY s.updated_at DESC"""
+                """SELECT session_id, created_at, updated_at, message_count
+                   FROM sessions
+                   ORDER BY updated_at DESC"""
             )
             rows = await cursor.fetchall()
 
@@ -211,26 +358,44 @@ class ChatMemoryManager:
 
 
 # ========== 上下文格式化工具 ==========
-def format_history_for_prompt(messages: list[ChatMessage], max_chars: int = 2000) -> str:
+
+# token 计数：优先用 tiktoken 精确计数，不可用时退化为字符估算
+# （get_encoding 首次使用会联网下载词表，离线环境下抛的是连接错误
+#   而不是 ImportError，所以这里必须宽口径捕获，保证启动不被拖垮）
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except Exception:
+    def count_tokens(text: str) -> int:
+        # 粗略估算：中文 ~1 token/字，英文 ~4 字符/token
+        return 1 + int(sum(1 if ord(c) > 127 else 0.25 for c in text))
+
+
+def format_history_for_prompt(messages: list[ChatMessage], max_tokens: int = 2000) -> str:
     """
     将历史消息格式化为prompt字符串
-    控制长度避免超出上下文窗口
+    按 token 预算截断，避免超出上下文窗口
+    （按字符截断对中文浪费预算、对英文会超额）
     """
     if not messages:
         return ""
 
     lines = []
-    total_chars = 0
+    total_tokens = 0
 
     # 从最近的消息开始，倒序添加
     for msg in reversed(messages):
         role_name = "用户" if msg.role == "human" else "助手"
         line = f"{role_name}: {msg.content}"
 
-        if total_chars + len(line) > max_chars:
+        line_tokens = count_tokens(line)
+        if total_tokens + line_tokens > max_tokens:
             break
 
         lines.insert(0, line)
-        total_chars += len(line)
+        total_tokens += line_tokens
 
     return "\n".join(lines)
\ No newline at end of file
@@ -2,13 +2,15 @@
 RAG 核心引擎
 整合：向量检索 + 对话历史 + LLM生成
 """
+from itertools import islice
 from typing import AsyncGenerator, Optional
 
-from langchain_ollama import OllamaLLM
+from cachetools import LRUCache
 
 from app.config import settings
 from app.core.vector_store import vector_manager
-from app.core.chat_memory import ChatMemoryManager, format_history_for_prompt
+from app.core.chat_memory import ChatMemoryManager
+from app.llm.ollama_client import llm_client
 
 
 class RAGEngine:
@@ -16,13 +18,35 @@ class RAGEngine:
 
     def __init__(self, memory_manager: ChatMemoryManager):
         self.memory = memory_manager
-        self.llm = OllamaLLM(
-            model=settings.LLM_MODEL,
-            base_url=settings.OLLAMA_BASE_URL,
-            temperature=0.7,
-            num_predict=1024
-        )
+        # LLM 生成参数（通过 Ollama options 传入）
+        self._llm_options = {
+            "temperature": 0.7,
+            "num_predict": settings.RESERVED_OUTPUT_TOKENS
+        }
         self.retriever = vector_manager.get_retriever()
+        # 检索结果缓存：重复/FAQ 类问题免去 embedding + 向量检索
+        # （向量库快照不变时检索是幂等的，缓存安全）
+        self._retrieval_cache: LRUCache = LRUCache(maxsize=512)
+        # 历史对话的 token 预算：上下文窗口扣除输出预留后取四分之一，
+        # 剩余留给知识库内容、指令和问题
+        self._history_budget = (
+            settings.CONTEXT_WINDOW - settings.RESERVED_OUTPUT_TOKENS
+        ) // 4
+        # Prompt 的固定开头只依赖启动配置，渲染一次，
+        # _build_prompt 每次只拼接动态部分
+        self._prompt_head = f"""你是"{settings.BOT_NAME}"，一个专业友好的AI助手，由{settings.BOT_COMPANY}开发。
+
+身份规则：
+- 你的名字是：{settings.BOT_NAME}
+- 你的开发者是：{settings.BOT_COMPANY}
+- 当被问到身份相关问题时，使用上述信息回答
+
+回答规则：
+1. 根据【知识库内容】回答问题
+2. 如果知识库没有相关信息，诚实说"我不太清楚这个问题"
+3. 保持友好、专业的语气
+4. 回答要简洁明了
+"""
 
     def _build_prompt(
             self,
@@ -30,36 +54,33 @@ class RAGEngine:
             context: str,
             history: str = ""
     ) -> str:
-        """构建完整的 Prompt"""
+        """构建完整的 Prompt（固定段取预渲染结果，一次 join）"""
+        parts = [self._prompt_head]
 
-        history_section = ""
         if history:
-            history_section = f"""
+            parts.append(f"""
 历史对话（用于理解上下文）:
 {history}
-"""
-
-        prompt = f"""你是"{settings.BOT_NAME}"，一个专业友好的AI助手，由{settings.BOT_COMPANY}开发。
+""")
 
-身份规则：
-- 你的名字是：{settings.BOT_NAME}
-- 你的开发者是：{settings.BOT_COMPANY}
-- 当被问到身份相关问题时，使用上述信息回答
-
-回答规则：
-1. 根据【知识库内容】回答问题
-2. 如果知识库没有相关信息，诚实说"我不太清楚这个问题"
-3. 保持友好、专业的语气
-4. 回答要简洁明了
-{history_section}
+        parts.append(f"""
 【知识库内容】:
 {context}
 
 【用户问题】: {question}
 
-【回答】:"""
+【回答】:""")
+
+        return "".join(parts)
 
-        return prompt
+    def _retrieve(self, question: str) -> list:
+        """检索相关文档（带 LRU 缓存，按归一化问题命中）"""
+        key = question.strip().lower()
+        docs = self._retrieval_cache.get(key)
+        if docs is None:
+            docs = self.retriever.invoke(question)[:settings.RETRIEVER_K]
+            self._retrieval_cache[key] = docs
+        return docs
 
     async def ask(
             self,
@@ -71,27 +92,29 @@ class RAGEngine:
         返回：(答案, 来源列表)
         """
         # 1. 获取历史对话
-        history_messages = await self.memory.get_history(session_id)
-        history_text = format_history_for_prompt(history_messages)
+        history_text = await self.memory.iter_history_for_prompt(
+            session_id, max_tokens=self._history_budget
+        )
 
         # 2. 检索相关文档
-        docs = self.retriever.invoke(question)
+        docs = self._retrieve(question)
         context = "\n\n---\n\n".join(doc.page_content for doc in docs)
 
         # 3. 构建 prompt
         prompt = self._build_prompt(question, context, history_text)
 
-        # 4. 调用 LLM
-        answer = self.llm.invoke(prompt)
+        # 4. 调用 LLM（异步，不阻塞事件循环）
+        answer = await llm_client.achat(prompt, options=self._llm_options)
 
-        # 5. 保存对话
-        await self.memory.add_message(session_id, "human", question)
-        await self.memory.add_message(session_id, "ai", answer)
+        # 5. 保存对话（问答成对写入，单事务）
+        await self.memory.add_messages(
+            session_id, [("human", question), ("ai", answer)]
+        )
 
         # 6. 提取来源
         sources = [
             f"[{doc.metadata.get('source', '未知')}] {doc.page_content[:80]}..."
-            for doc in docs[:3]
+            for doc in islice(docs, 3)
         ]
 
         return answer, sources
@@ -105,22 +128,24 @@ class RAGEngine:
         流式问答
         """
         # 1. 获取历史对话
-        history_messages = await self.memory.get_history(session_id)
-        history_text = format_history_for_prompt(history_messages)
+        history_text = await self.memory.iter_history_for_prompt(
+            session_id, max_tokens=self._history_budget
+        )
 
         # 2. 检索相关文档
-        docs = self.retriever.invoke(question)
+        docs = self._retrieve(question)
         context = "\n\n---\n\n".join(doc.page_content for doc in docs)
 
         # 3. 构建 prompt
         prompt = self._build_prompt(question, context, history_text)
 
-        # 4. 流式生成
+        # 4. 流式生成（异步，不阻塞事件循环）
         full_answer = ""
-        for chunk in self.llm.stream(prompt):
+        async for chunk in llm_client.achat_stream(prompt, options=self._llm_options):
             full_answer += chunk
             yield chunk
 
-        # 5. 保存完整对话
-        await self.memory.add_message(session_id, "human", question)
-        await self.memory.add_message(session_id, "ai", full_answer)
\ No newline at end of file
+        # 5. 保存完整对话（问答成对写入，单事务）
+        await self.memory.add_messages(
+            session_id, [("human", question), ("ai", full_answer)]
+        )
\ No newline at end of file
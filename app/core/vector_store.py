@@ -2,6 +2,9 @@
 向量数据库管理
 负责：文档加载、分块、向量化、检索
 """
+import itertools
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -23,49 +26,71 @@ class VectorStoreManager:
         )
         self.vectordb: Optional[Chroma] = None
         self.chunks_count = 0
+        # 分块器无状态且配置固定，构建一次反复使用
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.CHUNK_SIZE,
+            chunk_overlap=settings.CHUNK_OVERLAP,
+            separators=["\n\n", "\n", "。", "！", "？", "；", "，", " ", ""]
+        )
 
     def load_documents(self, data_dir: Path) -> list[Document]:
         """从目录加载文档"""
         documents = []
 
-        for file_path in data_dir.glob("*"):
-            if file_path.suffix in [".txt", ".md"]:
-                try:
-                    content = file_path.read_text(encoding="utf-8")
-                    doc = Document(
-                        page_content=content,
-                        metadata={
-                            "source": file_path.name,
-                            "file_type": file_path.suffix
-                        }
-                    )
-                    documents.append(doc)
-                    print(f"  ✓ 加载: {file_path.name}")
-                except Exception as e:
-                    print(f"  ✗ 加载失败 {file_path.name}: {e}")
+        # 按后缀 glob，过滤在文件系统层完成，不再 stat 目录下所有条目
+        for file_path in itertools.chain(data_dir.glob("*.txt"), data_dir.glob("*.md")):
+            try:
+                # read_bytes + decode 跳过 read_text 的 universal-newline 转换
+                content = file_path.read_bytes().decode("utf-8")
+                doc = Document(
+                    page_content=content,
+                    metadata={
+                        "source": file_path.name,
+                        "file_type": file_path.suffix
+                    }
+                )
+                documents.append(doc)
+                print(f"  ✓ 加载: {file_path.name}")
+            except Exception as e:
+                print(f"  ✗ 加载失败 {file_path.name}: {e}")
 
         return documents
 
     def split_documents(self, documents: list[Document]) -> list[Document]:
         """文档分块"""
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            separators=["\n\n", "\n", "。", "！", "？", "；", "，", " ", ""]
-        )
-        chunks = splitter.split_documents(documents)
-        return chunks
+        return self._splitter.split_documents(documents)
 
     def create_vectorstore(self, chunks: list[Document], persist: bool = True):
-        """创建向量数据库"""
+        """创建向量数据库（分批并行 embedding）"""
         persist_dir = str(settings.VECTOR_DB_DIR) if persist else None
 
-        self.vectordb = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
+        self.vectordb = Chroma(
+            embedding_function=self.embeddings,
             persist_directory=persist_dir,
             collection_name="knowledge_base"
         )
+
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        ids = [str(uuid.uuid4()) for _ in chunks]
+
+        # 按批并行调用 embedding，流水线掩盖 Ollama 单请求延迟
+        # （Chroma.from_documents 会逐块串行请求 embedding）
+        batch_size = 64
+        batches = [
+            texts[i:i + batch_size]
+            for i in range(0, len(texts), batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            batch_vectors = list(pool.map(self.embeddings.embed_documents, batches))
+        vectors = [vector for batch in batch_vectors for vector in batch]
+
+        self.vectordb._collection.add(
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=metadatas
+        )
         self.chunks_count = len(chunks)
         print(f"✅ 向量库创建完成，共 {self.chunks_count} 个文档块")
 
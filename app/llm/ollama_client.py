@@ -2,8 +2,9 @@
 Ollama LLM 客户端
 """
 import requests
-import json
-from typing import Generator, Optional
+import orjson
+import httpx
+from typing import Generator, List, Optional
 from app.config import settings
 
 
@@ -19,10 +20,29 @@ class OllamaClient:
         self.base_url = base_url or settings.OLLAMA_BASE_URL
         self.model = model or settings.LLM_MODEL
         self.timeout = timeout
+        # 同步请求走 Session 复用连接（keep-alive），避免每次对话重建 TCP
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # 异步客户端惰性创建（首次 await 时初始化）
+        self._aclient: Optional[httpx.AsyncClient] = None
+
+    def close(self):
+        """关闭同步连接池（应用关闭时调用）"""
+        self._session.close()
+
+    def _get_aclient(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout
+            )
+        return self._aclient
 
     def chat(self, prompt: str, model: str = None) -> str:
         """非流式对话"""
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/api/generate",
             json={
                 "model": model or self.model,
@@ -34,9 +54,131 @@ class OllamaClient:
         response.raise_for_status()
         return response.json()["response"]
 
+    def chat_messages(
+            self,
+            messages: List[dict],
+            model: str = None,
+            tools: Optional[List[dict]] = None
+    ) -> dict:
+        """多轮对话（/api/chat），支持原生 function-calling
+
+        返回 message 字典，包含 content 和可选的 tool_calls
+        """
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": False
+        }
+        if tools:
+            payload["tools"] = tools
+
+        response = self._session.post(
+            f"{self.base_url}/api/chat",
+            json=payload,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()["message"]
+
+    async def achat(
+            self,
+            prompt: str,
+            model: str = None,
+            options: Optional[dict] = None
+    ) -> str:
+        """非流式对话的异步版本，不阻塞事件循环"""
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": False
+        }
+        if options:
+            payload["options"] = options
+
+        response = await self._get_aclient().post("/api/generate", json=payload)
+        response.raise_for_status()
+        return response.json()["response"]
+
+    async def achat_stream(
+            self,
+            prompt: str,
+            model: str = None,
+            options: Optional[dict] = None
+    ):
+        """流式对话的异步版本，逐 token 产出"""
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": True
+        }
+        if options:
+            payload["options"] = options
+
+        async with self._get_aclient().stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = orjson.loads(line)
+                if "response" in data:
+                    yield data["response"]
+                if data.get("done", False):
+                    break
+
+    async def achat_messages(
+            self,
+            messages: List[dict],
+            model: str = None,
+            tools: Optional[List[dict]] = None
+    ) -> dict:
+        """chat_messages 的异步版本，不占用线程池"""
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": False
+        }
+        if tools:
+            payload["tools"] = tools
+
+        response = await self._get_aclient().post("/api/chat", json=payload)
+        response.raise_for_status()
+        return response.json()["message"]
+
+    async def achat_messages_stream(
+            self,
+            messages: List[dict],
+            model: str = None,
+            tools: Optional[List[dict]] = None
+    ):
+        """流式多轮对话，逐块产出 message 字典（含 content 增量 / tool_calls）"""
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": True
+        }
+        if tools:
+            payload["tools"] = tools
+
+        async with self._get_aclient().stream("POST", "/api/chat", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = orjson.loads(line)
+                if "message" in data:
+                    yield data["message"]
+                if data.get("done", False):
+                    break
+
+    async def aclose(self):
+        """关闭异步客户端（在应用关闭时调用）"""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
     def chat_stream(self, prompt: str, model: str = None) -> Generator[str, None, None]:
         """流式对话"""
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/api/generate",
             json={
                 "model": model or self.model,
@@ -48,9 +190,10 @@ class OllamaClient:
         )
         response.raise_for_status()
 
+        # iter_lines 产出 bytes，orjson 可直接解析，省掉逐行 decode
         for line in response.iter_lines():
             if line:
-                data = json.loads(line)
+                data = orjson.loads(line)
                 if "response" in data:
                     yield data["response"]
                 if data.get("done", False):
@@ -4,10 +4,8 @@ FastAPI 应用入口
 from contextlib import asynccontextmanager #Python提供的 异步生命周期管理器
 from fastapi import FastAPI  #创建 FastAPI 应用核心类
 from fastapi.middleware.cors import CORSMiddleware #CORS 中间件 解决跨域访问的问题
+from fastapi.responses import ORJSONResponse  #orjson 序列化，比默认 json 快
 
-from app.api.routes import router, init_components
-from app.api.auth_routes import router as auth_router, init_auth
-from app.api.agent_routes import router as agent_router  # 新增
 from app.config import settings
 
 
@@ -16,6 +14,17 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     print("🚀 正在启动系统...")
 
+    # 路由模块在这里才导入：它们会连带拉起 langchain/chroma 等重依赖，
+    # 推迟到 lifespan 让进程更快进入启动流程（reload 时尤其明显）
+    from app.api.routes import router, init_components, close_components
+    from app.api.auth_routes import router as auth_router, init_auth, close_auth
+    from app.api.agent_routes import router as agent_router
+
+    # 注册路由
+    app.include_router(auth_router, prefix="/api")   # 认证路由
+    app.include_router(router, prefix="/api")         # RAG 路由
+    app.include_router(agent_router, prefix="/api")   # Agent 路由
+
     # 初始化认证模块 读取用户数据库路径
     # 初始化用户表
     auth_db_path = str(settings.CHAT_HISTORY_DIR / "users.db")
@@ -33,6 +42,17 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    # 释放 LLM 客户端连接
+    from app.llm.ollama_client import llm_client
+    await llm_client.aclose()
+    llm_client.close()
+
+    # 关闭认证数据库连接
+    await close_auth()
+
+    # 关闭聊天记录连接池
+    await close_components()
+
     print("👋 系统关闭")
 
 
@@ -46,7 +66,8 @@ app = FastAPI(
     title=f"{settings.BOT_NAME} API",
     description="RAG + Agent 智能问答系统",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # 跨域配置
@@ -58,11 +79,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 注册路由
-app.include_router(auth_router, prefix="/api")   # 认证路由
-app.include_router(router, prefix="/api")         # RAG 路由
-app.include_router(agent_router, prefix="/api")   # Agent 路由（新增）
-
 
 @app.get("/")
 def root():
@@ -18,6 +18,14 @@ class BaseTool(ABC):
 
     name: str = "base_tool"
     description: str = "基础工具"
+    # JSON Schema 参数定义（用于 Ollama 原生 function-calling）
+    parameters: dict = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "工具参数"}
+        },
+        "required": ["query"]
+    }
 
     @abstractmethod
     def run(self, *args, **kwargs) -> ToolResult:
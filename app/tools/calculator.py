@@ -1,23 +1,71 @@
 """
 计算器工具
 """
+import ast
+import operator
+from functools import lru_cache
+
 from app.tools.base import BaseTool, ToolResult
 
 
+# 允许的运算符白名单，白名单之外的节点一律拒绝
+_ALLOWED_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+def _eval_node(node):
+    """递归求值 AST 节点，只接受数字常量和白名单运算"""
+    if isinstance(node, ast.Expression):
+        return _eval_node(node.body)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, (int, float)):
+            return node.value
+        raise ValueError(f"不支持的常量: {node.value!r}")
+    if isinstance(node, ast.BinOp):
+        op = _ALLOWED_OPS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"不支持的运算符: {type(node.op).__name__}")
+        return op(_eval_node(node.left), _eval_node(node.right))
+    if isinstance(node, ast.UnaryOp):
+        op = _ALLOWED_OPS.get(type(node.op))
+        if op is None:
+            raise ValueError(f"不支持的运算符: {type(node.op).__name__}")
+        return op(_eval_node(node.operand))
+    raise ValueError(f"不支持的表达式: {type(node).__name__}")
+
+
+@lru_cache(maxsize=256)
+def _evaluate(expression: str):
+    """解析并求值（按表达式缓存，重复计算免去解析）"""
+    tree = ast.parse(expression, mode="eval")
+    return _eval_node(tree)
+
+
 class CalculatorTool(BaseTool):
     """数学计算"""
 
     name = "calculate"
     description = "计算数学表达式，参数为表达式字符串，如 '123*456'"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "expression": {"type": "string", "description": "数学表达式，如 '123*456'"}
+        },
+        "required": ["expression"]
+    }
 
     def run(self, expression: str) -> ToolResult:
         try:
-            # 安全的数学计算（只允许数字和运算符）
-            allowed = set("0123456789+-*/.() ")
-            if not all(c in allowed for c in expression):
-                return ToolResult(success=False, data=None, error="表达式包含非法字符")
-
-            result = eval(expression)
+            result = _evaluate(expression.strip())
             return ToolResult(success=True, data=str(result))
         except Exception as e:
-            return ToolResult(success=False, data=None, error=f"计算错误: {e}")
\ No newline at end of file
+            return ToolResult(success=False, data=None, error=f"计算错误: {e}")
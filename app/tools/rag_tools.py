@@ -10,6 +10,13 @@ class RAGTool(BaseTool):
 
     name = "search_knowledge"
     description = "搜索本地知识库获取公司/产品相关信息，参数为搜索问题"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "搜索问题"}
+        },
+        "required": ["query"]
+    }
 
     def run(self, query: str) -> ToolResult:
         try:
@@ -1,7 +1,7 @@
 """
 工具注册表 - 管理所有可用工具
 """
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from app.tools.base import BaseTool
 from app.tools.time_tool import TimeTool
 from app.tools.calculator import CalculatorTool
@@ -15,10 +15,13 @@ class ToolRegistry:
 
     def __init__(self):
         self._tools: Dict[str, BaseTool] = {}
+        # 描述字符串缓存，注册新工具时失效
+        self._desc_cache: Optional[str] = None
 
     def register(self, tool: BaseTool):
         """注册工具"""
         self._tools[tool.name] = tool
+        self._desc_cache = None
         print(f"  ✓ 注册工具: {tool.name}")
 
     def get(self, name: str) -> Optional[BaseTool]:
@@ -29,12 +32,32 @@ class ToolRegistry:
         """列出所有工具名"""
         return list(self._tools.keys())
 
+    def iter_tools(self) -> Iterable[BaseTool]:
+        """迭代所有工具对象（避免按名字逐个 get）"""
+        return self._tools.values()
+
+    def get_tool_schemas(self) -> List[dict]:
+        """获取 OpenAI 风格的工具 Schema 列表（用于 Ollama 原生 function-calling）"""
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.parameters
+                }
+            }
+            for tool in self._tools.values()
+        ]
+
     def get_tools_description(self) -> str:
-        """获取所有工具的描述（用于 Prompt）"""
-        descriptions = []
-        for name, tool in self._tools.items():
-            descriptions.append(f"- {name}: {tool.description}")
-        return "\n".join(descriptions)
+        """获取所有工具的描述（用于 Prompt，注册表不变时直接返回缓存）"""
+        if self._desc_cache is None:
+            self._desc_cache = "\n".join(
+                f"- {name}: {tool.description}"
+                for name, tool in self._tools.items()
+            )
+        return self._desc_cache
 
     def execute(self, tool_name: str, *args, **kwargs):
         """执行工具"""
@@ -9,6 +9,13 @@ class WebSearchTool(BaseTool):
 
     name = "web_search"
     description = "搜索互联网获取最新信息，参数为搜索关键词"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "搜索关键词"}
+        },
+        "required": ["query"]
+    }
 
     def run(self, query: str) -> ToolResult:
         if not query:
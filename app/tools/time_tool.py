@@ -4,14 +4,27 @@
 """
 import datetime
 import calendar
+from functools import lru_cache
+
 from app.tools.base import BaseTool, ToolResult
 
 
+# 星期名常量，模块加载时构建一次
+_WEEKDAY_MAP = ("星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日")
+
+
+@lru_cache(maxsize=64)
+def _days_in_month(year: int, month: int) -> int:
+    """某年某月的天数（同一个月内重复调用直接命中缓存）"""
+    return calendar.monthrange(year, month)[1]
+
+
 class TimeTool(BaseTool):
     """获取当前时间及详细时间信息"""
 
     name = "get_current_time"
     description = "获取当前完整时间信息，包括日期、星期、是否闰年等，无需参数"
+    parameters = {"type": "object", "properties": {}, "required": []}
 
     def run(self) -> ToolResult:
         now = datetime.datetime.now()
@@ -21,8 +34,7 @@ class TimeTool(BaseTool):
         day = now.day
 
         # ===== 星期 =====
-        weekday_map = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
-        weekday = weekday_map[now.weekday()]
+        weekday = _WEEKDAY_MAP[now.weekday()]
 
         # ===== 是否闰年 =====
         is_leap = calendar.isleap(year)
@@ -34,7 +46,7 @@ class TimeTool(BaseTool):
         day_of_week = now.isoweekday()  # 1-7
 
         # ===== 本月多少天 =====
-        days_in_month = calendar.monthrange(year, month)[1]
+        days_in_month = _days_in_month(year, month)
 
         # ===== 是否月末 =====
         is_month_end = day == days_in_month
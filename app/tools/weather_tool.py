@@ -9,6 +9,13 @@ class WeatherTool(BaseTool):
 
     name = "get_weather"
     description = "获取指定城市的天气，参数为城市名称，如 '北京'"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "city": {"type": "string", "description": "城市名称，如 '北京'"}
+        },
+        "required": ["city"]
+    }
 
     def run(self, city: str = "北京") -> ToolResult:
         try: